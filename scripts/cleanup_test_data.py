@@ -4,7 +4,6 @@ Keeps only the real migrated workout data
 """
 
 import sqlite3
-import pandas as pd
 
 
 def main():
@@ -16,19 +15,22 @@ def main():
 
     # Show what we're about to delete
     print("\n📋 Test data to be deleted (from first ETL test run):")
-    test_data = pd.read_sql("""
+    cursor = conn.execute("""
         SELECT id, workout_date, exercise_name, set_number, reps, weight, volume
         FROM workout_sets_raw
         WHERE created_at = '2026-01-05T21:50:11.530202'
         ORDER BY id
-    """, conn)
+    """)
+    test_data = cursor.fetchall()
 
     if len(test_data) == 0:
         print("  ✓ No test data found - database is already clean!")
         conn.close()
         return
 
-    print(test_data.to_string(index=False))
+    print('\t'.join(col[0] for col in cursor.description))
+    for row in test_data:
+        print('\t'.join(map(str, row)))
     print(f"\n  Total: {len(test_data)} test sets")
 
     # Delete the test data
@@ -45,21 +47,21 @@ def main():
 
     # Show updated summary
     print("\n📊 Updated Database Summary:")
-    total_sets = pd.read_sql('SELECT COUNT(*) as count FROM workout_sets_raw', conn).iloc[0]['count']
+    total_sets = conn.execute('SELECT COUNT(*) FROM workout_sets_raw').fetchone()[0]
     print(f"  Total sets in raw table: {total_sets}")
 
-    volume_summary = pd.read_sql("""
+    volume_summary = conn.execute("""
         SELECT exercise_name, COUNT(*) as sets, SUM(volume) as total_volume
         FROM workout_sets_raw
         WHERE volume IS NOT NULL
         GROUP BY exercise_name
         ORDER BY total_volume DESC
         LIMIT 5
-    """, conn)
+    """).fetchall()
 
     print("\n  Top 5 exercises by volume:")
-    for _, row in volume_summary.iterrows():
-        print(f"    {row['exercise_name']}: {int(row['sets'])} sets, {row['total_volume']:.0f} kg")
+    for name, sets, total_volume in volume_summary:
+        print(f"    {name}: {sets} sets, {total_volume:.0f} kg")
 
     conn.close()
 
@@ -1,6 +1,9 @@
 import pandas as pd
 from datetime import datetime
-from openpyxl import load_workbook
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.workbook.defined_name import DefinedName
 from openpyxl.worksheet.datavalidation import DataValidation
 
 # Read the existing exercise list
@@ -33,26 +36,46 @@ workout_input_df = pd.DataFrame({
 })
 
 # Create Excel file with multiple sheets
-with pd.ExcelWriter('../data/Workout_Tracker.xlsx', engine='openpyxl') as writer:
-    # Write Session_Info sheet (workout-level data)
-    session_info_df.to_excel(writer, sheet_name='Session_Info', index=False)
+# Write-only mode streams rows straight to disk instead of building the
+# full cell model in memory (the file is written once and never re-read)
+wb = Workbook(write_only=True)
 
-    # Write Exercises reference sheet
-    exercises_df.to_excel(writer, sheet_name='Exercises', index=False)
+sheets = [
+    ('Session_Info', session_info_df),      # Workout-level data
+    ('Exercises', exercises_df),            # Exercises reference sheet
+    ('Workout_Input', workout_input_df),    # Example data that can be cleared
+]
 
-    # Write Workout_Input sheet (with example data that can be cleared)
-    workout_input_df.to_excel(writer, sheet_name='Workout_Input', index=False)
+for sheet_name, df in sheets:
+    ws = wb.create_sheet(sheet_name)
+
+    header = []
+    for col in df.columns:
+        cell = WriteOnlyCell(ws, value=col)
+        cell.font = Font(bold=True)
+        header.append(cell)
+    ws.append(header)
+
+    # Blank cells for missing values, like DataFrame.to_excel
+    values = df.astype(object).where(df.notna(), None)
+    for row in values.itertuples(index=False, name=None):
+        ws.append(row)
 
 # Now add data validation for the exercise_name column
-wb = load_workbook('../data/Workout_Tracker.xlsx')
 ws_input = wb['Workout_Input']
 
-# Create a data validation that references the exercise_name column in Exercises sheet
-# The formula references cells B2 to B44 (43 exercises + header row)
+# Name the exercise_name column in the Exercises sheet, sized to the actual list
+# The range covers cells B2 to B44 (43 exercises + header row)
 num_exercises = len(exercises_df)
+wb.defined_names['ExerciseList'] = DefinedName(
+    'ExerciseList',
+    attr_text=f"Exercises!$B$2:$B${num_exercises + 1}"
+)
+
+# Create a data validation that references the named exercise list
 dv = DataValidation(
     type="list",
-    formula1=f"=Exercises!$B$2:$B${num_exercises + 1}",
+    formula1="=ExerciseList",
     allow_blank=False
 )
 dv.error = 'Please select an exercise from the list'
@@ -61,9 +84,10 @@ dv.prompt = 'Select an exercise from the dropdown'
 dv.promptTitle = 'Exercise Selection'
 
 # Add the validation to the exercise_name column (column A)
-# Apply to 1000 rows to give plenty of room for logging
-ws_input.add_data_validation(dv)
-dv.add(f'A2:A1000')
+# Apply to 200 rows, which is plenty of room for logging a single workout
+# (write-only sheets have no add_data_validation, so append to the list directly)
+ws_input.data_validations.append(dv)
+dv.add('A2:A200')
 
 wb.save('../data/Workout_Tracker.xlsx')
 
@@ -7,6 +7,7 @@ import sqlite3
 from datetime import datetime
 
 import pandas as pd
+from openpyxl import load_workbook
 
 
 def extract_workout_date(inputs_sheet):
@@ -18,40 +19,56 @@ def extract_workout_date(inputs_sheet):
     return str(date_col).split()[0]  # fallback
 
 
+def sheet_to_dataframe(worksheet):
+    """Build a DataFrame from a worksheet, using the first row as the header"""
+    rows = worksheet.values
+    columns = next(rows)
+    df = pd.DataFrame(rows, columns=columns)
+
+    # Trim trailing blank rows and read fully blank columns as NaN, like pd.read_excel
+    non_blank_rows = df.index[df.notna().any(axis=1)]
+    df = df.iloc[:non_blank_rows[-1] + 1 if len(non_blank_rows) else 0].copy()
+    empty_cols = df.columns[df.isna().all()]
+    df[empty_cols] = df[empty_cols].astype('float64')
+    return df
+
+
 def transform_wide_to_narrow(workout_data, workout_date, location):
     """Transform wide format (Weight_1, Reps_1, etc.) to narrow format (one row per set)"""
 
     # Filter out rows without exercise names
     workout_data = workout_data[workout_data['Exercise'].notna()].copy()
 
-    rows = []
+    # Reshape Weight_N/Reps_N pairs into one row per set in a single pass.
+    # Exercise names can repeat, so key each row by its position instead.
+    set_cols = [col for col in workout_data.columns
+                if str(col).startswith(('Weight_', 'Reps_'))]
+    wide = workout_data[['Exercise'] + set_cols].reset_index(drop=True)
+    wide['row_id'] = wide.index
 
-    for idx, row in workout_data.iterrows():
-        exercise_name = row['Exercise']
+    narrow = pd.wide_to_long(
+        wide,
+        stubnames=['Weight', 'Reps'],
+        i='row_id',
+        j='set_number',
+        sep='_'
+    ).reset_index()
 
-        # Process up to 4 sets
-        for set_num in range(1, 5):
-            weight_col = f'Weight_{set_num}'
-            reps_col = f'Reps_{set_num}'
+    # Keep the original exercise order, then set order within each exercise
+    narrow = narrow.sort_values(['row_id', 'set_number'])
 
-            weight = row.get(weight_col)
-            reps = row.get(reps_col)
+    # Only keep a set if we have at least weight OR reps data
+    narrow = narrow.dropna(subset=['Weight', 'Reps'], how='all')
 
-            # Only create a row if we have at least weight OR reps data
-            if pd.notna(weight) or pd.notna(reps):
-                rows.append({
-                    'workout_date': workout_date,
-                    'location': location,
-                    'exercise_name': exercise_name,
-                    'set_number': set_num,
-                    'reps': reps if pd.notna(reps) else None,
-                    'weight': weight if pd.notna(weight) else None,
-                    'time': None,  # Old format didn't track time
-                    'distance': None,  # Old format didn't track distance properly
-                    'rpe': None,  # Old format didn't have RPE
-                })
+    narrow = narrow.rename(columns={'Exercise': 'exercise_name', 'Weight': 'weight', 'Reps': 'reps'})
+    narrow['workout_date'] = workout_date
+    narrow['location'] = location
+    narrow['time'] = None  # Old format didn't track time
+    narrow['distance'] = None  # Old format didn't track distance properly
+    narrow['rpe'] = None  # Old format didn't have RPE
 
-    return pd.DataFrame(rows)
+    return narrow[['workout_date', 'location', 'exercise_name', 'set_number',
+                   'reps', 'weight', 'time', 'distance', 'rpe']].reset_index(drop=True)
 
 
 def load_exercises_from_db():
@@ -65,18 +82,17 @@ def load_exercises_from_db():
 def enrich_with_exercise_data(workout_data, exercises_df):
     """Join with exercises to get exercise_id and calculate volume"""
 
-    # Join with exercises
-    workout_data = workout_data.merge(
-        exercises_df,
-        on='exercise_name',
-        how='left'
+    # Join with exercises (hash lookup on the index)
+    workout_data = workout_data.join(
+        exercises_df.set_index('exercise_name'),
+        on='exercise_name'
     )
 
     # Calculate volume
     workout_data['volume'] = workout_data['weight'] * workout_data['reps']
 
-    # Add timestamp
-    workout_data['created_at'] = datetime.now().isoformat()
+    # Add timestamp (one scalar broadcast to every row)
+    workout_data = workout_data.assign(created_at=datetime.now().isoformat())
 
     # Check for unmatched exercises
     unmatched = workout_data[workout_data['exercise_id'].isna()]
@@ -101,31 +117,41 @@ def load_to_database(workout_data):
     # Add missing columns (muscle_group, category) as None since old data didn't have them
     workout_data['muscle_group'] = None
     workout_data['category'] = None
+    raw_cols = raw_cols + ['muscle_group', 'category']
+
+    # Bulk parameterized INSERTs; the connection context manager commits
+    # (or rolls back) the whole load
+    with conn:
+        cursor = conn.cursor()
+
+        # Insert into raw table
+        cursor.executemany(
+            f"INSERT INTO workout_sets_raw ({', '.join(raw_cols)}) VALUES ({', '.join('?' * len(raw_cols))})",
+            workout_data[raw_cols].itertuples(index=False, name=None)
+        )
+
+        print(f"  ✓ Appended {len(workout_data)} sets to workout_sets_raw")
+
+        # Upsert into clean table (replace if date/exercise/set already exists)
+        clean_cols = ['workout_date', 'exercise_id', 'set_number', 'reps', 'weight',
+                      'time', 'distance', 'rpe', 'volume']
+
+        # Sets without an exercise_id never conflict (NULLs are distinct in the key),
+        # so clear this date's unmatched sets before re-inserting them
+        workout_date = workout_data['workout_date'].iloc[0]
+        cursor.execute('DELETE FROM workout_sets WHERE workout_date = ? AND exercise_id IS NULL',
+                       (workout_date,))
+
+        cursor.executemany('''
+            INSERT INTO workout_sets (workout_date, exercise_id, set_number, reps, weight,
+                                      time, distance, rpe, volume)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (workout_date, exercise_id, set_number) DO UPDATE SET
+                reps = excluded.reps, weight = excluded.weight, time = excluded.time,
+                distance = excluded.distance, rpe = excluded.rpe, volume = excluded.volume
+        ''', workout_data[clean_cols].itertuples(index=False, name=None))
+        print(f"  ✓ Upserted {len(workout_data)} sets to workout_sets")
 
-    # Insert into raw table
-    workout_data[raw_cols + ['muscle_group', 'category']].to_sql(
-        'workout_sets_raw',
-        conn,
-        if_exists='append',
-        index=False
-    )
-
-    print(f"  ✓ Appended {len(workout_data)} sets to workout_sets_raw")
-
-    # Insert into clean table (removing duplicates for same date/exercise/set)
-    clean_cols = ['workout_date', 'exercise_id', 'set_number', 'reps', 'weight',
-                  'time', 'distance', 'rpe', 'volume']
-
-    # Delete existing records for this workout_date before inserting
-    workout_date = workout_data['workout_date'].iloc[0]
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM workout_sets WHERE workout_date = ?', (workout_date,))
-    print(f"  ✓ Cleared existing data for {workout_date}")
-
-    workout_data[clean_cols].to_sql('workout_sets', conn, if_exists='append', index=False)
-    print(f"  ✓ Inserted {len(workout_data)} sets to workout_sets")
-
-    conn.commit()
     conn.close()
 
 
@@ -136,10 +162,12 @@ def main():
 
     # Read old Excel file
     print("\n📥 Reading Workout_Inputs.xlsx...")
-    xl = pd.ExcelFile('../data/Workout_Inputs.xlsx')
+    # Read-only mode streams cells instead of loading the whole workbook
+    wb = load_workbook('../data/Workout_Inputs.xlsx', read_only=True, data_only=True)
 
-    inputs_sheet = pd.read_excel(xl, 'Inputs')
-    workout_data = pd.read_excel(xl, 'Workout_Inputs')
+    inputs_sheet = sheet_to_dataframe(wb['Inputs'])
+    workout_data = sheet_to_dataframe(wb['Workout_Inputs'])
+    wb.close()
 
     # Extract metadata
     workout_date = extract_workout_date(inputs_sheet)
@@ -169,9 +197,9 @@ def main():
         'volume': 'sum'
     }).sort_values('volume', ascending=False)
 
-    for exercise, stats in exercise_summary.iterrows():
-        volume = f"{stats['volume']:.0f} kg" if pd.notna(stats['volume']) else "N/A"
-        print(f"    {exercise}: {int(stats['set_number'])} sets, {volume}")
+    for exercise, set_count, total_volume in exercise_summary.itertuples(index=True, name=None):
+        volume = f"{total_volume:.0f} kg" if pd.notna(total_volume) else "N/A"
+        print(f"    {exercise}: {int(set_count)} sets, {volume}")
 
     # Load to database
     print("\n📤 Loading to database...")
@@ -3,16 +3,20 @@ Workout Data ETL Pipeline
 Extracts data from Google Sheets, transforms it, and loads into SQLite database
 """
 
+import functools
 import json
 import os
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
 import gspread
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 from google.oauth2.service_account import Credentials
+from gspread.utils import fill_gaps, numericise_all
 
 # Load environment variables
 load_dotenv()
@@ -25,8 +29,9 @@ DB_PATH = 'data/workouts.db'
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
 
 
+@functools.lru_cache(maxsize=1)
 def get_google_sheets_client():
-    """Initialize and return Google Sheets client"""
+    """Initialize and return Google Sheets client (authorized once per run)"""
     # Try to load from environment variable first (for GitHub Actions)
     creds_json = os.getenv('GOOGLE_CREDENTIALS_JSON')
     if creds_json:
@@ -50,17 +55,32 @@ def get_google_sheets_client():
     return client
 
 
-def extract_from_sheets():
+def values_to_dataframe(values):
+    """Build a DataFrame from raw sheet values, like Worksheet.get_all_records"""
+    if not values:
+        return pd.DataFrame()
+
+    # Clip stray cells to the right of the header, then pad short rows
+    header = values[0]
+    rows = fill_gaps([row[:len(header)] for row in values[1:]], cols=len(header))
+    records = [numericise_all(row) for row in rows]
+    return pd.DataFrame(records, columns=header)
+
+
+def extract_from_sheets(spreadsheet):
     """Extract data from Google Sheets"""
     print("📥 Extracting data from Google Sheets...")
 
-    client = get_google_sheets_client()
-    spreadsheet = client.open_by_key(SHEET_ID)
+    # Read all sheets in a single API call
+    response = spreadsheet.values_batch_get(['Session_Info', 'Exercises', 'Workout_Input'])
+    session_values, exercise_values, workout_values = (
+        value_range.get('values', []) for value_range in response['valueRanges']
+    )
 
-    # Read all sheets
-    session_info = pd.DataFrame(spreadsheet.worksheet('Session_Info').get_all_records())
-    exercises = pd.DataFrame(spreadsheet.worksheet('Exercises').get_all_records())
-    workout_input = pd.DataFrame(spreadsheet.worksheet('Workout_Input').get_all_records())
+    # Session_Info is only used as field/value pairs, so keep it as raw rows
+    session_info = [numericise_all(row[:2]) for row in fill_gaps(session_values[1:], cols=2)]
+    exercises = values_to_dataframe(exercise_values)
+    workout_input = values_to_dataframe(workout_values)
 
     print(f"  ✓ Session_Info: {len(session_info)} fields")
     print(f"  ✓ Exercises: {len(exercises)} exercises")
@@ -74,7 +94,7 @@ def transform_data(session_info, exercises, workout_input):
     print("\n🔄 Transforming data...")
 
     # Convert session_info from vertical to horizontal (field/value pairs)
-    session_dict = dict(zip(session_info['field'], session_info['value']))
+    session_dict = dict(session_info)
     workout_date = session_dict.get('workout_date')
     location = session_dict.get('location')
     workout_length = session_dict.get('workout_length')
@@ -93,23 +113,22 @@ def transform_data(session_info, exercises, workout_input):
     workout_input['workout_date'] = workout_date
     workout_input['location'] = location
 
-    # Join with exercises to get exercise_id and muscle_group
-    workout_input = workout_input.merge(
-        exercises[['exercise_name', 'exercise_id', 'muscle_group', 'category']],
-        on='exercise_name',
-        how='left'
+    # Join with exercises to get exercise_id and muscle_group (hash lookup on the index)
+    exercises_indexed = exercises.set_index('exercise_name')
+    workout_input = workout_input.join(
+        exercises_indexed[['exercise_id', 'muscle_group', 'category']],
+        on='exercise_name'
     )
 
-    # Replace empty strings with None for numeric columns
-    numeric_cols = ['reps', 'weight', 'time', 'distance']
-    for col in numeric_cols:
-        workout_input[col] = pd.to_numeric(workout_input[col], errors='coerce')
+    # Replace empty strings with None for numeric columns (one pass over the block)
+    numeric_cols = ['reps', 'weight', 'time', 'distance', 'rpe']
+    workout_input[numeric_cols] = workout_input[numeric_cols].apply(pd.to_numeric, errors='coerce')
 
     # Calculate volume (weight × reps) for strength exercises
     workout_input['volume'] = workout_input['weight'] * workout_input['reps']
 
-    # Add timestamp
-    workout_input['created_at'] = datetime.now().isoformat()
+    # Add timestamp (one scalar broadcast to every row)
+    workout_input = workout_input.assign(created_at=datetime.now().isoformat())
 
     # Filter out rows with no exercise_name (empty rows)
     workout_input = workout_input[workout_input['exercise_name'].notna() & (workout_input['exercise_name'] != '')]
@@ -119,17 +138,54 @@ def transform_data(session_info, exercises, workout_input):
     workout_input = workout_input.copy()
     workout_input['set_number'] = workout_input.groupby('exercise_name').cumcount() + 1
 
+    # Store whole-number columns as compact nullable integers when every value fits;
+    # anything else (fractions, typos out of range) is left as float64 and stored as-is.
+    # weight/time/distance stay float64 so float32 rounding never reaches the database
+    compact_dtypes = {'reps': 'Int16', 'rpe': 'Int8', 'set_number': 'Int8', 'exercise_id': 'Int32'}
+    for col, dtype in compact_dtypes.items():
+        values = workout_input[col]
+        if not pd.api.types.is_numeric_dtype(values):
+            continue
+        present = values.dropna()
+        limits = np.iinfo(dtype.lower())
+        if present.mod(1).eq(0).all() and present.between(limits.min, limits.max).all():
+            workout_input[col] = values.astype(dtype)
+
     print(f"  ✓ Processed {len(workout_input)} valid sets")
     print(f"  ✓ Calculated volume for strength exercises")
 
     return workout_input, session_dict
 
 
+def connect_database():
+    """Open a SQLite connection tuned for bulk loads"""
+    conn = sqlite3.connect(DB_PATH)
+
+    # WAL journaling persists in the database file; the rest are per-connection
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute('PRAGMA cache_size=-64000')  # 64 MB
+
+    return conn
+
+
+def to_db_rows(df):
+    """Yield DataFrame rows as plain Python tuples that sqlite3 can bind"""
+    # Convert one row at a time (missing -> None, NumPy scalars -> Python) so the
+    # compact dtypes aren't copied into a whole object-dtype frame for the insert
+    for row in df.itertuples(index=False, name=None):
+        yield tuple(
+            None if pd.isna(value) else value.item() if isinstance(value, np.generic) else value
+            for value in row
+        )
+
+
 def initialize_database():
     """Create database schema if it doesn't exist"""
     print("\n🗄️  Initializing database...")
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect_database()
     cursor = conn.cursor()
 
     # Create exercises reference table
@@ -142,6 +198,18 @@ def initialize_database():
         )
     ''')
 
+    # Older databases had this table recreated by pandas without its constraints,
+    # so make sure exercise_id (the upsert key in load_to_database) and
+    # exercise_name are unique
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_exercises_id
+        ON exercises (exercise_id)
+    ''')
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_exercises_name
+        ON exercises (exercise_name)
+    ''')
+
     # Create raw workout sets table (append-only)
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS workout_sets_raw (
@@ -190,6 +258,20 @@ def initialize_database():
         )
     ''')
 
+    # Index raw sets by date (per-date lookups and distinct-date counts)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_raw_date
+        ON workout_sets_raw (workout_date)
+    ''')
+
+    # Partial covering index for the volume-by-muscle-group summary
+    # (cardio rows have no volume, so they stay out of the index)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_raw_muscle_vol
+        ON workout_sets_raw (muscle_group, volume)
+        WHERE volume IS NOT NULL
+    ''')
+
     conn.commit()
     conn.close()
 
@@ -200,75 +282,105 @@ def load_to_database(workout_data, exercises_df, session_dict):
     """Load data into SQLite database"""
     print("\n📤 Loading data to database...")
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    # Upsert exercises (insert or ignore if already exists)
-    exercises_df.to_sql('exercises', conn, if_exists='replace', index=False)
-    print(f"  ✓ Loaded {len(exercises_df)} exercises to reference table")
-
-    # Save session metadata (upsert - replace if date exists)
-    workout_date = session_dict.get('workout_date')
-    cursor.execute('''
-        INSERT OR REPLACE INTO workout_sessions (workout_date, session_data, created_at)
-        VALUES (?, ?, ?)
-    ''', (workout_date, json.dumps(session_dict), datetime.now().isoformat()))
-    print(f"  ✓ Saved session metadata ({len(session_dict)} fields)")
-
-    # Append to raw table (always insert)
-    raw_cols = ['workout_date', 'location', 'exercise_id', 'exercise_name', 'muscle_group',
-                'category', 'set_number', 'reps', 'weight', 'time', 'distance', 'rpe', 'volume', 'created_at']
-    workout_data[raw_cols].to_sql('workout_sets_raw', conn, if_exists='append', index=False)
-    print(f"  ✓ Appended {len(workout_data)} sets to raw table")
-
-    # Upsert to clean table (replace if date/exercise/set already exists)
-    clean_cols = ['workout_date', 'exercise_id', 'set_number', 'reps', 'weight', 'time', 'distance', 'rpe', 'volume']
-
-    # Delete existing records for this workout_date before inserting
-    workout_date = workout_data['workout_date'].iloc[0]
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM workout_sets WHERE workout_date = ?', (workout_date,))
+    conn = connect_database()
+
+    # Bulk parameterized INSERTs; the connection context manager commits
+    # (or rolls back) the whole load
+    with conn:
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+
+        # Skip blank or malformed sheet rows (no whole-number id or no name)
+        exercise_ids = pd.to_numeric(exercises_df['exercise_id'], errors='coerce')
+        exercise_names = exercises_df['exercise_name'].fillna('').astype(str).str.strip()
+        valid = exercise_ids.notna() & exercise_ids.mod(1).eq(0) & (exercise_names != '')
+        exercises_df = exercises_df[valid].assign(exercise_id=exercise_ids[valid].astype('int64'))
+
+        # Drop stale rows still holding a name the sheet now gives to another id
+        # (e.g. two exercises swapped names), so the upsert can't hit the unique name
+        cursor.executemany(
+            'DELETE FROM exercises WHERE exercise_name = ? AND exercise_id != ?',
+            exercises_df[['exercise_name', 'exercise_id']].itertuples(index=False, name=None)
+        )
 
-    workout_data[clean_cols].to_sql('workout_sets', conn, if_exists='append', index=False)
-    print(f"  ✓ Upserted {len(workout_data)} sets to clean table")
+        # Upsert exercises keyed on exercise_id (insert new ids, refresh renamed ones)
+        exercise_cols = ['exercise_id', 'exercise_name', 'muscle_group', 'category']
+        cursor.executemany('''
+            INSERT INTO exercises (exercise_id, exercise_name, muscle_group, category)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (exercise_id) DO UPDATE SET
+                exercise_name = excluded.exercise_name, muscle_group = excluded.muscle_group,
+                category = excluded.category
+        ''', exercises_df[exercise_cols].itertuples(index=False, name=None))
+        print(f"  ✓ Loaded {len(exercises_df)} exercises to reference table")
+
+        # Save session metadata (upsert - replace if date exists)
+        workout_date = session_dict.get('workout_date')
+        cursor.execute('''
+            INSERT OR REPLACE INTO workout_sessions (workout_date, session_data, created_at)
+            VALUES (?, ?, ?)
+        ''', (workout_date, json.dumps(session_dict), datetime.now().isoformat()))
+        print(f"  ✓ Saved session metadata ({len(session_dict)} fields)")
+
+        # Append to raw table (always insert)
+        raw_cols = ['workout_date', 'location', 'exercise_id', 'exercise_name', 'muscle_group',
+                    'category', 'set_number', 'reps', 'weight', 'time', 'distance', 'rpe', 'volume', 'created_at']
+        cursor.executemany(
+            f"INSERT INTO workout_sets_raw ({', '.join(raw_cols)}) VALUES ({', '.join('?' * len(raw_cols))})",
+            to_db_rows(workout_data[raw_cols])
+        )
+        print(f"  ✓ Appended {len(workout_data)} sets to raw table")
+
+        # Upsert to clean table (replace if date/exercise/set already exists)
+        clean_cols = ['workout_date', 'exercise_id', 'set_number', 'reps', 'weight', 'time', 'distance', 'rpe', 'volume']
+
+        # Sets without an exercise_id never conflict (NULLs are distinct in the key),
+        # so clear this date's unmatched sets before re-inserting them
+        workout_date = workout_data['workout_date'].iloc[0]
+        cursor.execute('DELETE FROM workout_sets WHERE workout_date = ? AND exercise_id IS NULL',
+                       (workout_date,))
+
+        cursor.executemany('''
+            INSERT INTO workout_sets (workout_date, exercise_id, set_number, reps, weight, time, distance, rpe, volume)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (workout_date, exercise_id, set_number) DO UPDATE SET
+                reps = excluded.reps, weight = excluded.weight, time = excluded.time,
+                distance = excluded.distance, rpe = excluded.rpe, volume = excluded.volume
+        ''', to_db_rows(workout_data[clean_cols]))
+        print(f"  ✓ Upserted {len(workout_data)} sets to clean table")
 
-    conn.commit()
     conn.close()
 
 
-def clear_input_sheets():
+def clear_input_sheets(spreadsheet, num_workout_rows, num_session_rows):
     """Clear Workout_Input sheet after successful processing"""
     print("\n🧹 Clearing input sheets for next workout...")
 
-    client = get_google_sheets_client()
-    spreadsheet = client.open_by_key(SHEET_ID)
-
-    # Clear Workout_Input sheet (keep header row)
-    workout_sheet = spreadsheet.worksheet('Workout_Input')
+    # Row counts (excluding headers) come from the values extract_from_sheets
+    # already read, so the clear below is the only API call
 
-    # Get all values to check how many rows exist
-    all_values = workout_sheet.get_all_values()
+    ranges_to_clear = []
 
-    if len(all_values) > 1:  # If there's data beyond the header
+    if num_workout_rows > 0:  # If there's data beyond the header
         # Clear everything except the header row (row 1)
         # Data validation is tied to the range, so it will persist
-        workout_sheet.batch_clear(['A2:Z1000'])
-        print(f"  ✓ Cleared {len(all_values) - 1} rows from Workout_Input")
-    else:
-        print("  ✓ Workout_Input already empty")
+        ranges_to_clear.append('Workout_Input!A2:Z1000')
 
-    # Reset Session_Info values (but keep structure)
-    session_sheet = spreadsheet.worksheet('Session_Info')
+    if num_session_rows > 0:
+        # Reset Session_Info values (but keep structure)
+        ranges_to_clear.append(f'Session_Info!B2:B{num_session_rows + 1}')
 
-    # Dynamically clear all value cells based on actual row count
-    all_session_values = session_sheet.get_all_values()
-    num_rows = len(all_session_values) - 1  # Exclude header row
+    # Clear both sheets in a single API call
+    if ranges_to_clear:
+        spreadsheet.values_batch_clear(body={'ranges': ranges_to_clear})
 
-    if num_rows > 0:
-        # Create empty values list matching the number of data rows
-        empty_values = [[''] for _ in range(num_rows)]
-        session_sheet.update(values=empty_values, range_name=f'B2:B{num_rows + 1}')
-        print(f"  ✓ Reset {num_rows} Session_Info values for next workout")
+    if num_workout_rows > 0:
+        print(f"  ✓ Cleared {num_workout_rows} rows from Workout_Input")
+    else:
+        print("  ✓ Workout_Input already empty")
+
+    if num_session_rows > 0:
+        print(f"  ✓ Reset {num_session_rows} Session_Info values for next workout")
     else:
         print("  ✓ Session_Info already empty")
 
@@ -277,29 +389,29 @@ def generate_summary_report():
     """Generate a summary of what's in the database"""
     print("\n📊 Database Summary:")
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect_database()
 
     # Total sets
-    total_sets = pd.read_sql_query('SELECT COUNT(*) as count FROM workout_sets_raw', conn).iloc[0]['count']
+    total_sets = conn.execute('SELECT COUNT(*) FROM workout_sets_raw').fetchone()[0]
     print(f"  Total sets logged: {total_sets}")
 
     # Unique workout dates
-    unique_dates = pd.read_sql_query('SELECT COUNT(DISTINCT workout_date) as count FROM workout_sets_raw', conn).iloc[0]['count']
+    unique_dates = conn.execute('SELECT COUNT(DISTINCT workout_date) FROM workout_sets_raw').fetchone()[0]
     print(f"  Unique workout dates: {unique_dates}")
 
     # Total volume by muscle group
-    volume_by_muscle = pd.read_sql_query('''
+    volume_by_muscle = conn.execute('''
         SELECT muscle_group, SUM(volume) as total_volume
         FROM workout_sets_raw
         WHERE volume IS NOT NULL
         GROUP BY muscle_group
         ORDER BY total_volume DESC
         LIMIT 5
-    ''', conn)
+    ''').fetchall()
 
     print("\n  Top 5 muscle groups by volume:")
-    for _, row in volume_by_muscle.iterrows():
-        print(f"    {row['muscle_group']}: {row['total_volume']:.0f} kg")
+    for muscle_group, total_volume in volume_by_muscle:
+        print(f"    {muscle_group}: {total_volume:.0f} kg")
 
     conn.close()
 
@@ -311,11 +423,19 @@ def main():
     print("=" * 60)
 
     try:
-        # Initialize database
-        initialize_database()
+        # Initialize database in the background while the sheets are fetched
+        # (disk-only vs network-only work, so the two overlap)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            init_future = executor.submit(initialize_database)
+
+            # Authorize once and share the spreadsheet handle across steps
+            client = get_google_sheets_client()
+            spreadsheet = client.open_by_key(SHEET_ID)
+
+            # EXTRACT
+            session_info, exercises, workout_input = extract_from_sheets(spreadsheet)
 
-        # EXTRACT
-        session_info, exercises, workout_input = extract_from_sheets()
+            init_future.result()
 
         # TRANSFORM
         transformed_data, session_dict = transform_data(session_info, exercises, workout_input)
@@ -331,7 +451,7 @@ def main():
         load_to_database(transformed_data, exercises, session_dict)
 
         # CLEAR INPUT SHEETS (prepare for next workout)
-        clear_input_sheets()
+        clear_input_sheets(spreadsheet, len(workout_input), len(session_info))
 
         # REPORT
         generate_summary_report()